@@ -1,6 +1,8 @@
-import requests
-import time
+import aiohttp
+import asyncio
+import orjson
 import os
+import random
 import logging
 from typing import Dict, Any, Optional
 from .models import AssemblyAITranscriptionRequest, AssemblyAITranscriptionResponse
@@ -8,107 +10,185 @@ from .utils import format_openai_error
 
 
 class AssemblyAIClient:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = api_key or os.getenv("ASSEMBLYAI_API_KEY")
         if not self.api_key:
             raise ValueError("AssemblyAI API key is required")
-        
+
         self.base_url = "https://api.assemblyai.com/v2"
         self.headers = {
             "authorization": self.api_key,
             "content-type": "application/json"
         }
         self.logger = logging.getLogger(__name__)
-        
+
+        # Shared aiohttp session (created in the app lifespan) so connection
+        # pooling and keep-alive work across requests
+        self.session = session
+        self._owns_session = session is None
+
         # Timeout and polling settings
         self.timeout_seconds = 300
-        self.poll_interval = 0.1 #100ms polling interval
+        self.poll_interval = 0.1 #initial 100ms polling interval
+        self.max_poll_interval = 5.0 #backoff cap
         self.upload_url = f"{self.base_url}/upload"
-    
-    def upload_file(self, file_content: bytes, filename: str) -> str:
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating a private one if none was provided"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    async def close(self):
+        """Close the session if this client created it"""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def upload_file(self, file_content: bytes, filename: str) -> str:
         """Upload file to AssemblyAI and return the upload URL"""
         self.logger.info(f"Uploading file: {filename}")
-        
+
+        session = await self._get_session()
+
         try:
-            response = requests.post(
+            form = aiohttp.FormData()
+            form.add_field('file', file_content, filename=filename)
+
+            async with session.post(
                 self.upload_url,
-                files={'file': (filename, file_content)},
+                data=form,
                 headers={'authorization': self.api_key},
-                timeout=60
-            )
-            response.raise_for_status()
-            
-            result = response.json()
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+
             upload_url = result.get('upload_url')
-            
+
             if not upload_url:
                 raise Exception("No upload URL returned from AssemblyAI")
-            
+
             self.logger.info(f"File uploaded successfully: {upload_url}")
             return upload_url
-            
-        except requests.exceptions.RequestException as e:
+
+        except aiohttp.ClientError as e:
+            self.logger.error(f"Failed to upload file: {str(e)}")
+            raise Exception(f"Failed to upload file: {str(e)}")
+
+    async def upload_file_stream(self, file_obj, filename: str) -> str:
+        """Stream a file-like object to AssemblyAI without buffering it in memory
+
+        AssemblyAI's /upload endpoint accepts a raw request body, so the
+        object (e.g. an UploadFile's SpooledTemporaryFile) is sent in chunks
+        instead of being read into a bytes object first.
+        """
+        self.logger.info(f"Uploading file (streaming): {filename}")
+
+        session = await self._get_session()
+
+        try:
+            async with session.post(
+                self.upload_url,
+                data=file_obj,
+                headers={
+                    'authorization': self.api_key,
+                    'content-type': 'application/octet-stream'
+                },
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+
+            upload_url = result.get('upload_url')
+
+            if not upload_url:
+                raise Exception("No upload URL returned from AssemblyAI")
+
+            self.logger.info(f"File uploaded successfully: {upload_url}")
+            return upload_url
+
+        except aiohttp.ClientError as e:
             self.logger.error(f"Failed to upload file: {str(e)}")
             raise Exception(f"Failed to upload file: {str(e)}")
-    
-    def submit_transcription(self, request: AssemblyAITranscriptionRequest) -> Dict[str, Any]:
+
+    async def submit_transcription(self, request: AssemblyAITranscriptionRequest) -> Dict[str, Any]:
         """Submit transcription job to AssemblyAI"""
         url = f"{self.base_url}/transcript"
-        
+
         # Convert the request to dict to get all fields including extra ones
-        payload = request.dict(exclude_none=True)
-        
+        payload = request.model_dump(exclude_none=True)
+
         # Ensure required fields are present
         if "audio_url" not in payload:
             raise ValueError("audio_url is required")
-        
+
         self.logger.info(f"Submitting transcription job for audio URL: {request.audio_url}")
         self.logger.info(f"Payload being sent to AssemblyAI: {payload}")
-        
+
+        session = await self._get_session()
+
         try:
-            response = requests.post(url, json=payload, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
+            async with session.post(
+                url,
+                json=payload,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status >= 400:
+                    try:
+                        error_detail = await response.json()
+                        self.logger.error(f"AssemblyAI error response: {error_detail}")
+                    except Exception:
+                        self.logger.error(f"AssemblyAI response text: {await response.text()}")
+                response.raise_for_status()
+                result = await response.json()
+
             self.logger.info(f"Transcription job submitted successfully: {result.get('id')}")
             return result
-            
-        except requests.exceptions.RequestException as e:
+
+        except aiohttp.ClientError as e:
             self.logger.error(f"Failed to submit transcription job: {str(e)}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_detail = e.response.json()
-                    self.logger.error(f"AssemblyAI error response: {error_detail}")
-                except:
-                    self.logger.error(f"AssemblyAI response text: {e.response.text}")
             raise Exception(f"Failed to submit transcription job: {str(e)}")
-    
-    def get_transcription_status(self, transcript_id: str) -> Dict[str, Any]:
+
+    async def get_transcription_status(self, transcript_id: str) -> Dict[str, Any]:
         """Get transcription status from AssemblyAI"""
         url = f"{self.base_url}/transcript/{transcript_id}"
-        
+
+        session = await self._get_session()
+
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
+            async with session.get(
+                url,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                response.raise_for_status()
+                return await response.json(loads=orjson.loads)
+
+        except aiohttp.ClientError as e:
             self.logger.error(f"Failed to get transcription status: {str(e)}")
             raise Exception(f"Failed to get transcription status: {str(e)}")
-    
-    def wait_for_completion(self, transcript_id: str) -> Dict[str, Any]:
-        """Poll for transcription completion with fixed 100ms interval"""
-        start_time = time.time()
-        
-        self.logger.info(f"Waiting for transcription completion: {transcript_id}")
-        
-        while time.time() - start_time < self.timeout_seconds:
+
+    def _next_poll_interval(self, interval: float) -> float:
+        """Grow the polling interval exponentially (capped) with random jitter"""
+        return min(self.max_poll_interval, interval * 1.5) * random.uniform(0.8, 1.2)
+
+    async def _poll_loop(self, transcript_id: str) -> Dict[str, Any]:
+        """Poll for completion with exponential backoff and jitter
+
+        Runs until the transcript completes or errors; the overall timeout
+        is enforced by asyncio.wait_for in wait_for_completion.
+        """
+        interval = self.poll_interval
+
+        while True:
             try:
-                result = self.get_transcription_status(transcript_id)
+                result = await self.get_transcription_status(transcript_id)
                 status = result.get("status")
-                
+
                 self.logger.debug(f"Transcription status: {status}")
-                
+
                 if status == "completed":
                     self.logger.info(f"Transcription completed successfully: {transcript_id}")
                     return result
@@ -117,38 +197,50 @@ class AssemblyAIClient:
                     self.logger.error(f"Transcription failed: {error_msg}")
                     raise Exception(f"Transcription failed: {error_msg}")
                 elif status in ["queued", "processing"]:
-                    # Continue polling with fixed interval
-                    time.sleep(self.poll_interval)
+                    # Continue polling with backed-off interval
+                    interval = self._next_poll_interval(interval)
+                    await asyncio.sleep(interval)
                 else:
                     self.logger.warning(f"Unknown status: {status}")
-                    time.sleep(self.poll_interval)
-                    
+                    interval = self._next_poll_interval(interval)
+                    await asyncio.sleep(interval)
+
             except Exception as e:
                 if "Transcription failed:" in str(e):
                     raise  # Re-raise transcription errors
-                
+
                 self.logger.warning(f"Error polling status, retrying: {str(e)}")
-                time.sleep(self.poll_interval)
-        
-        # Timeout reached
-        self.logger.error(f"Transcription timeout after {self.timeout_seconds} seconds")
-        raise Exception(f"Transcription timeout after {self.timeout_seconds} seconds")
-    
-    def transcribe(self, request: AssemblyAITranscriptionRequest) -> Dict[str, Any]:
+                interval = self._next_poll_interval(interval)
+                await asyncio.sleep(interval)
+
+    async def wait_for_completion(self, transcript_id: str) -> Dict[str, Any]:
+        """Wait for transcription completion with an overall timeout"""
+        self.logger.info(f"Waiting for transcription completion: {transcript_id}")
+
+        try:
+            return await asyncio.wait_for(
+                self._poll_loop(transcript_id),
+                timeout=self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            self.logger.error(f"Transcription timeout after {self.timeout_seconds} seconds")
+            raise Exception(f"Transcription timeout after {self.timeout_seconds} seconds")
+
+    async def transcribe(self, request: AssemblyAITranscriptionRequest) -> Dict[str, Any]:
         """Complete transcription workflow"""
         try:
             # Submit transcription job
-            submit_result = self.submit_transcription(request)
+            submit_result = await self.submit_transcription(request)
             transcript_id = submit_result.get("id")
-            
+
             if not transcript_id:
                 raise Exception("No transcript ID returned from AssemblyAI")
-            
+
             # Wait for completion
-            result = self.wait_for_completion(transcript_id)
-            
+            result = await self.wait_for_completion(transcript_id)
+
             return result
-            
+
         except Exception as e:
             self.logger.error(f"Transcription workflow failed: {str(e)}")
             raise
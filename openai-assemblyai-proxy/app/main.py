@@ -1,7 +1,12 @@
 import os
 import logging
-from fastapi import FastAPI, HTTPException, Request, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+import asyncio
+import secrets
+import aiohttp
+from typing import Dict, Any, List
+from collections import OrderedDict
+from fastapi import FastAPI, HTTPException, Request, Response, File, UploadFile, Form
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from .models import (
     OpenAITranscriptionRequest, 
@@ -17,6 +22,7 @@ from .utils import (
     map_openai_model_to_speech_model,
     parse_word_boost,
     format_openai_error,
+    format_openai_error_bytes,
     convert_assemblyai_to_openai_response,
     validate_audio_url,
     get_current_timestamp,
@@ -28,13 +34,39 @@ from .utils import (
 # Setup logging
 logger = setup_logging()
 
+# Public base URL of this service (e.g. the Cloud Run URL). When set,
+# transcriptions are completed via AssemblyAI webhooks instead of polling.
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL")
+
+# Shared secret AssemblyAI echoes back on webhook delivery; generated per
+# process when not configured so the callback route is never open to
+# unauthenticated callers
+WEBHOOK_AUTH_HEADER = "X-Webhook-Secret"
+WEBHOOK_AUTH_SECRET = os.getenv("WEBHOOK_AUTH_SECRET") or secrets.token_urlsafe(32)
+
+# Cap on cached per-key clients so garbage Authorization values from
+# unauthenticated callers cannot grow the cache without bound
+MAX_CACHED_CLIENTS = 128
+
+# Transcripts waiting on a webhook callback, keyed by transcript ID
+pending_transcripts: Dict[str, asyncio.Event] = {}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     logger.info("Starting OpenAI to AssemblyAI Proxy API")
+    # Single shared session so all requests reuse the same connection pool;
+    # keep-alive avoids a fresh TCP+TLS handshake on every status poll
+    app.state.http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=75)
+    )
+    # AssemblyAI clients cached per API key (LRU, bounded) so construction
+    # happens once per active key
+    app.state.aai_clients = OrderedDict()
     logger.info("API started successfully - AssemblyAI API key will be taken from client requests")
     yield
+    await app.state.http_session.close()
     logger.info("API shutting down")
 
 
@@ -43,7 +75,8 @@ app = FastAPI(
     title="OpenAI to AssemblyAI Proxy API",
     description="Proxy API that makes AssemblyAI compatible with OpenAI Python SDK",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
@@ -51,15 +84,128 @@ app = FastAPI(
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
     logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    # Static payload - serve cached pre-serialized bytes
+    return Response(
         status_code=500,
-        content=format_openai_error(
-            message="Internal server error",
-            error_type="api_error"
-        )
+        content=format_openai_error_bytes("Internal server error", "api_error"),
+        media_type="application/json"
     )
 
 
+def extract_api_key(request: Request) -> str:
+    """Extract the AssemblyAI API key from the Authorization header"""
+    auth_header = request.headers.get("authorization")
+    if not auth_header:
+        raise HTTPException(
+            status_code=401,
+            detail=format_openai_error(
+                "No authorization header provided",
+                "invalid_request_error",
+                "missing_authorization"
+            )
+        )
+
+    # Extract the API key (format: "Bearer sk-...")
+    if auth_header.startswith("Bearer "):
+        api_key = auth_header[7:]  # Remove "Bearer " prefix
+    else:
+        api_key = auth_header  # Direct API key
+
+    if not api_key:
+        raise HTTPException(
+            status_code=401,
+            detail=format_openai_error(
+                "Invalid authorization header format",
+                "invalid_request_error",
+                "invalid_authorization"
+            )
+        )
+    return api_key
+
+
+def get_assemblyai_client(request: Request, api_key: str) -> AssemblyAIClient:
+    """Return the cached AssemblyAIClient for this API key, creating it once
+
+    The cache is a bounded LRU: the least recently used client is evicted
+    past MAX_CACHED_CLIENTS. Eviction is cheap because clients share the
+    app-wide session and hold no other resources.
+    """
+    clients = request.app.state.aai_clients
+    client = clients.get(api_key)
+    if client is None:
+        client = AssemblyAIClient(api_key=api_key, session=request.app.state.http_session)
+        clients[api_key] = client
+        if len(clients) > MAX_CACHED_CLIENTS:
+            clients.popitem(last=False)
+    else:
+        clients.move_to_end(api_key)
+    return client
+
+
+async def transcribe_with_webhook(client: AssemblyAIClient, assemblyai_request: AssemblyAITranscriptionRequest) -> Dict[str, Any]:
+    """Submit a job and park on its webhook callback, falling back to polling"""
+    submit_result = await client.submit_transcription(assemblyai_request)
+    transcript_id = submit_result.get("id")
+
+    if not transcript_id:
+        raise Exception("No transcript ID returned from AssemblyAI")
+
+    event = asyncio.Event()
+    pending_transcripts[transcript_id] = event
+
+    try:
+        await asyncio.wait_for(event.wait(), timeout=client.timeout_seconds)
+    except asyncio.TimeoutError:
+        # Webhook never arrived - fall back to polling before giving up
+        logger.warning(f"Webhook not received for {transcript_id}, falling back to polling")
+        return await client.wait_for_completion(transcript_id)
+    finally:
+        pending_transcripts.pop(transcript_id, None)
+
+    result = await client.get_transcription_status(transcript_id)
+    status = result.get("status")
+
+    if status == "completed":
+        return result
+
+    if status == "error":
+        error_msg = result.get("error", "Unknown error occurred")
+        raise Exception(f"Transcription failed: {error_msg}")
+
+    # Early, duplicate or stale webhook - the transcript is not final yet,
+    # so never hand back a queued/processing payload; poll until it is
+    logger.warning(f"Webhook fired for {transcript_id} but status is '{status}', resuming polling")
+    return await client.wait_for_completion(transcript_id)
+
+
+@app.post("/v1/internal/webhook")
+async def assemblyai_webhook(request: Request, payload: Dict[str, Any]):
+    """Receive AssemblyAI completion webhooks and wake the waiting request"""
+    # Only AssemblyAI knows the shared secret we attached at submission
+    provided_secret = request.headers.get(WEBHOOK_AUTH_HEADER, "")
+    if not secrets.compare_digest(provided_secret, WEBHOOK_AUTH_SECRET):
+        logger.warning("Webhook with missing or invalid auth header rejected")
+        raise HTTPException(
+            status_code=401,
+            detail=format_openai_error(
+                "Invalid webhook credentials",
+                "authentication_error",
+                "invalid_webhook_secret"
+            )
+        )
+
+    transcript_id = payload.get("transcript_id")
+    logger.info(f"Webhook received for transcript: {transcript_id} (status: {payload.get('status')})")
+
+    event = pending_transcripts.get(transcript_id)
+    if event:
+        event.set()
+    else:
+        logger.warning(f"Webhook for unknown transcript: {transcript_id}")
+
+    return {"received": True}
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint for Cloud Run"""
@@ -85,58 +231,37 @@ async def create_transcription(
     """
     
     try:
-        # Extract API key from Authorization header
-        auth_header = request.headers.get("authorization")
-        if not auth_header:
-            raise HTTPException(
-                status_code=401,
-                detail=format_openai_error(
-                    "No authorization header provided",
-                    "invalid_request_error",
-                    "missing_authorization"
-                )
-            )
-        
-        # Extract the API key (format: "Bearer sk-...")
-        api_key = None
-        if auth_header.startswith("Bearer "):
-            api_key = auth_header[7:]  # Remove "Bearer " prefix
-        else:
-            api_key = auth_header  # Direct API key
-        
-        if not api_key:
+        # Extract API key from Authorization header and reuse the cached client
+        api_key = extract_api_key(request)
+        client = get_assemblyai_client(request, api_key)
+
+        # Validate the model before any upload work so an invalid model
+        # fails fast instead of after a wasted transfer
+        speech_model = map_openai_model_to_speech_model(model)
+        if model and speech_model is None:
+            logger.warning(f"Invalid model parameter: '{model}'. Valid values are: best, slam-1, universal")
             raise HTTPException(
-                status_code=401,
+                status_code=400,
                 detail=format_openai_error(
-                    "Invalid authorization header format",
-                    "invalid_request_error",
-                    "invalid_authorization"
+                    message=f"Invalid model '{model}'. Valid AssemblyAI speech models are: best, slam-1, universal",
+                    error_type="invalid_request_error",
+                    code="invalid_model"
                 )
             )
+
+        # Log model mapping
+        if model and speech_model:
+            logger.info(f"Using AssemblyAI speech_model: '{speech_model}'")
+
         # Determine if we have a file upload or URL
         final_audio_url = None
-        
+
         if file:
             logger.info(f"Received transcription request with file upload: {file.filename}")
-            
-            # Initialize AssemblyAI client for file upload
-            try:
-                client = AssemblyAIClient(api_key=api_key)
-            except ValueError as e:
-                logger.error(f"Failed to initialize AssemblyAI client: {str(e)}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=format_openai_error(
-                        message="AssemblyAI API key not configured",
-                        error_type="api_error",
-                        code="missing_api_key"
-                    )
-                )
-            
-            # Read and upload file
+
+            # Stream the upload straight through without buffering it in memory
             try:
-                file_content = await file.read()
-                final_audio_url = client.upload_file(file_content, file.filename)
+                final_audio_url = await client.upload_file_stream(file.file, file.filename)
                 logger.info(f"File uploaded successfully: {final_audio_url}")
             except Exception as e:
                 logger.error(f"Failed to upload file: {str(e)}")
@@ -192,25 +317,8 @@ async def create_transcription(
         
         # Map OpenAI parameters to AssemblyAI format
         language_code = map_language_code(language)
-        speech_model = map_openai_model_to_speech_model(model)
         word_boost = parse_word_boost(cleaned_prompt)
-        
-        # Validate model parameter
-        if model and speech_model is None:
-            logger.warning(f"Invalid model parameter: '{model}'. Valid values are: best, slam-1, universal")
-            raise HTTPException(
-                status_code=400,
-                detail=format_openai_error(
-                    message=f"Invalid model '{model}'. Valid AssemblyAI speech models are: best, slam-1, universal",
-                    error_type="invalid_request_error",
-                    code="invalid_model"
-                )
-            )
-        
-        # Log model mapping
-        if model and speech_model:
-            logger.info(f"Using AssemblyAI speech_model: '{speech_model}'")
-        
+
         # Create base AssemblyAI request parameters
         base_params = {
             "audio_url": final_audio_url,
@@ -227,30 +335,25 @@ async def create_transcription(
         
         # Remove None values to avoid sending them to AssemblyAI
         merged_params = {k: v for k, v in merged_params.items() if v is not None}
-        
-        logger.info(f"Final AssemblyAI request parameters: {merged_params}")
+
+        # Route completion through our webhook endpoint when configured
+        if WEBHOOK_BASE_URL:
+            merged_params["webhook_url"] = f"{WEBHOOK_BASE_URL.rstrip('/')}/v1/internal/webhook"
+            merged_params["webhook_auth_header_name"] = WEBHOOK_AUTH_HEADER
+            merged_params["webhook_auth_header_value"] = WEBHOOK_AUTH_SECRET
+
+        # Keep the webhook secret out of the logs
+        logger.info(f"Final AssemblyAI request parameters: { {k: v for k, v in merged_params.items() if k != 'webhook_auth_header_value'} }")
         
         # Create AssemblyAI request
         assemblyai_request = AssemblyAITranscriptionRequest(**merged_params)
-        
-        # Initialize AssemblyAI client (if not already initialized for file upload)
-        if not file:
-            try:
-                client = AssemblyAIClient(api_key=api_key)
-            except ValueError as e:
-                logger.error(f"Failed to initialize AssemblyAI client: {str(e)}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=format_openai_error(
-                        message="AssemblyAI API key not configured",
-                        error_type="api_error",
-                        code="missing_api_key"
-                    )
-                )
-        
+
         # Perform transcription
         try:
-            assemblyai_response = client.transcribe(assemblyai_request)
+            if WEBHOOK_BASE_URL:
+                assemblyai_response = await transcribe_with_webhook(client, assemblyai_request)
+            else:
+                assemblyai_response = await client.transcribe(assemblyai_request)
             logger.info(f"Transcription completed successfully")
             
         except Exception as e:
@@ -294,9 +397,9 @@ async def create_transcription(
             response_format
         )
         
-        # Handle text response format
+        # Handle text response format - skip JSON serialization entirely
         if response_format == "text":
-            return openai_response
+            return PlainTextResponse(openai_response)
         
         logger.info("Transcription request completed successfully")
         return openai_response
@@ -314,16 +417,168 @@ async def create_transcription(
         )
 
 
+@app.post("/v1/audio/transcriptions/batch")
+async def create_transcription_batch(
+    request: Request,
+    file: UploadFile = File(None),
+    model: List[str] = Form(...),
+    language: str = Form(None),
+    prompt: str = Form(None),
+    response_format: str = Form("json"),
+    audio_url: str = Form(None)
+):
+    """
+    Transcribe one audio input with several speech models in a single request
+
+    The audio is uploaded to AssemblyAI once and a job is submitted per
+    model concurrently, so N models cost one upload instead of N.
+    """
+
+    try:
+        api_key = extract_api_key(request)
+        client = get_assemblyai_client(request, api_key)
+
+        # Validate every requested model up front, before any upload
+        speech_models = []
+        for requested_model in model:
+            speech_model = map_openai_model_to_speech_model(requested_model)
+            if speech_model is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=format_openai_error(
+                        message=f"Invalid model '{requested_model}'. Valid AssemblyAI speech models are: best, slam-1, universal",
+                        error_type="invalid_request_error",
+                        code="invalid_model"
+                    )
+                )
+            speech_models.append(speech_model)
+
+        # Resolve the audio input exactly once
+        if file:
+            logger.info(f"Received batch transcription request with file upload: {file.filename} ({len(speech_models)} models)")
+            try:
+                final_audio_url = await client.upload_file_stream(file.file, file.filename)
+            except Exception as e:
+                logger.error(f"Failed to upload file: {str(e)}")
+                raise HTTPException(
+                    status_code=400,
+                    detail=format_openai_error(
+                        message=f"Failed to upload file: {str(e)}",
+                        error_type="invalid_request_error",
+                        code="file_upload_failed"
+                    )
+                )
+        elif audio_url:
+            if not validate_audio_url(audio_url):
+                raise HTTPException(
+                    status_code=400,
+                    detail=format_openai_error(
+                        message="Invalid audio URL format or unsupported audio type",
+                        error_type="invalid_request_error",
+                        code="invalid_audio_url"
+                    )
+                )
+            final_audio_url = audio_url
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=format_openai_error(
+                    message="Either 'file' or 'audio_url' parameter is required",
+                    error_type="invalid_request_error",
+                    code="missing_audio_input"
+                )
+            )
+
+        # Shared parameter parsing, done once for all models
+        config_dict, cleaned_prompt = parse_prompt_for_config(prompt)
+        language_code = map_language_code(language)
+        word_boost = parse_word_boost(cleaned_prompt)
+
+        async def run_model(speech_model: str) -> Dict[str, Any]:
+            base_params = {
+                "audio_url": final_audio_url,
+                "language_code": language_code,
+                "speech_model": speech_model,
+                "word_boost": word_boost,
+                "speaker_labels": config_dict.get("speaker_labels", False),
+                "punctuate": True,
+                "format_text": True
+            }
+            merged_params = {**base_params, **config_dict}
+            merged_params = {k: v for k, v in merged_params.items() if v is not None}
+            merged_params["speech_model"] = speech_model
+            if WEBHOOK_BASE_URL:
+                merged_params["webhook_url"] = f"{WEBHOOK_BASE_URL.rstrip('/')}/v1/internal/webhook"
+                merged_params["webhook_auth_header_name"] = WEBHOOK_AUTH_HEADER
+                merged_params["webhook_auth_header_value"] = WEBHOOK_AUTH_SECRET
+
+            assemblyai_request = AssemblyAITranscriptionRequest(**merged_params)
+            if WEBHOOK_BASE_URL:
+                return await transcribe_with_webhook(client, assemblyai_request)
+            return await client.transcribe(assemblyai_request)
+
+        try:
+            responses = await asyncio.gather(*(run_model(sm) for sm in speech_models))
+        except Exception as e:
+            logger.error(f"Batch transcription failed: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=format_openai_error(
+                    message=str(e),
+                    error_type="api_error",
+                    code="transcription_failed"
+                )
+            )
+
+        logger.info(f"Batch transcription completed for {len(speech_models)} models")
+        return {
+            "results": [
+                {
+                    "model": requested_model,
+                    "transcription": convert_assemblyai_to_openai_response(response, response_format)
+                }
+                for requested_model, response in zip(model, responses)
+            ]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in batch transcription endpoint: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=format_openai_error(
+                message="Internal server error",
+                error_type="api_error"
+            )
+        )
+
+
 if __name__ == "__main__":
     import uvicorn
     
     port = int(os.getenv("PORT", "8080"))
     log_level = os.getenv("LOG_LEVEL", "info").lower()
-    
+    workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 2)))
+
+    # pending_transcripts lives in process memory, so a webhook callback
+    # must land on the worker that is waiting for it. With multiple
+    # workers most callbacks miss and every request eats the full
+    # wait_for timeout before the polling fallback - so webhook mode
+    # runs single-worker.
+    if WEBHOOK_BASE_URL and workers > 1:
+        logger.warning(f"WEBHOOK_BASE_URL is set - forcing 1 worker (WEB_CONCURRENCY={workers} ignored)")
+        workers = 1
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
         log_level=log_level,
+        workers=workers,
+        # uvloop + httptools (bundled with uvicorn[standard]) cut per-request
+        # event loop and HTTP parsing overhead vs the asyncio defaults
+        loop="uvloop",
+        http="httptools",
         reload=False
     )
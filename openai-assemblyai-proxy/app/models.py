@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Any, Dict
 from enum import Enum
 
@@ -9,6 +9,8 @@ class ResponseFormat(str, Enum):
 
 
 class OpenAITranscriptionRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     audio_url: str = Field(..., description="URL to the audio file")
     model: Optional[str] = Field(default="whisper-1", description="Model to use (ignored)")
     language: Optional[str] = Field(default=None, description="Language code (ISO 639-1)")
@@ -31,15 +33,17 @@ class AssemblyAITranscriptionRequest(BaseModel):
     word_boost: Optional[List[str]] = None
     speech_model: Optional[str] = None
     speaker_labels: Optional[bool] = None
+    webhook_url: Optional[str] = None
     punctuate: bool = True
     format_text: bool = True
-    
+
     # Allow additional fields for flexible config
-    class Config:
-        extra = "allow"
+    model_config = ConfigDict(extra="allow")
 
 
 class AssemblyAITranscriptionResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     id: str
     status: str
     text: Optional[str] = None
@@ -1,130 +1,151 @@
 import logging
+import orjson
 import os
+import re
+import time
+import numpy as np
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+
+# Matches a known audio extension (at a path/URL boundary) or the "audio"
+# keyword used by streaming URLs, in one scan of the URL
+_AUDIO_URL_RE = re.compile(
+    r'\.(?:wav|mp3|m4a|flac|ogg|aac|wma)(?=[?#/]|$)|audio',
+    re.IGNORECASE
+)
+
+# Below this many segments the NumPy round-trip costs more than it saves
+_VECTORIZE_MIN_ITEMS = 256
+
+# Millisecond-to-second conversion factor (multiply, don't divide)
+_MS_TO_S = 0.001
+
+# Constant Whisper-compatibility fields shared by every segment; merged into
+# each segment dict instead of rebuilding the literals per item
+_SEG_DEFAULTS = {
+    "tokens": [],
+    "temperature": 0.0,
+    "avg_logprob": 0.0,
+    "compression_ratio": 1.0,
+    "no_speech_prob": 0.0
+}
+
+# Single compiled pattern covering all the speaker diarization prompt flags
+# (speaker_labels/speaker_diarization/diarization with =, : or space, plus
+# the enable_* forms) so prompts are scanned once instead of per-pattern
+_DIARIZATION_RE = re.compile(
+    r'enable_speaker_(?:labels|diarization)'
+    r'|(?:speaker_labels|speaker_diarization|diarization)[ :=]true',
+    re.IGNORECASE
+)
+
+
+# Resolved once at import; the getattr default also guards against a
+# misspelled LOG_LEVEL value raising AttributeError
+_LOG_LEVEL = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
 
 
 def setup_logging():
     """Setup structured logging"""
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
     logging.basicConfig(
-        level=getattr(logging, log_level),
+        level=_LOG_LEVEL,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     return logging.getLogger(__name__)
 
 
+# OpenAI language codes whose AssemblyAI equivalent differs from the
+# lowercased code itself. Both sides use ISO 639-1, so today this is empty;
+# the old 23-entry mapping was pure identity.
+_LANGUAGE_OVERRIDES: Dict[str, str] = {}
+
+# Only accept valid AssemblyAI speech_model values
+_VALID_MODELS = frozenset({"best", "slam-1", "universal"})
+
+# Translation table turning comma separators into spaces for word boost parsing
+_COMMA_TO_SPACE = str.maketrans(",", " ")
+
+
+@lru_cache(maxsize=64)
 def map_language_code(openai_language: Optional[str]) -> Optional[str]:
     """Map OpenAI language codes to AssemblyAI language codes"""
     if not openai_language:
         return None
-    
-    # Basic mapping - AssemblyAI uses ISO 639-1 codes
-    language_mapping = {
-        "en": "en",
-        "es": "es", 
-        "fr": "fr",
-        "de": "de",
-        "it": "it",
-        "pt": "pt",
-        "nl": "nl",
-        "ja": "ja",
-        "ko": "ko",
-        "zh": "zh",
-        "ru": "ru",
-        "ar": "ar",
-        "hi": "hi",
-        "tr": "tr",
-        "pl": "pl",
-        "uk": "uk",
-        "vi": "vi",
-        "ms": "ms",
-        "th": "th",
-        "fi": "fi",
-        "da": "da",
-        "no": "no",
-        "sv": "sv"
-    }
-    
-    return language_mapping.get(openai_language.lower(), openai_language.lower())
 
+    code = openai_language.lower()
+    return _LANGUAGE_OVERRIDES.get(code, code)
 
+
+@lru_cache(maxsize=64)
 def map_openai_model_to_speech_model(openai_model: Optional[str]) -> Optional[str]:
     """Validate and return AssemblyAI speech_model parameter"""
     if not openai_model:
         return None
-    
-    # Only accept valid AssemblyAI speech_model values
-    valid_models = {"best", "slam-1", "universal"}
-    
-    if openai_model.lower() in valid_models:
+
+    if openai_model.lower() in _VALID_MODELS:
         return openai_model.lower()
-    
+
     # Return None for invalid models (will be handled by caller)
     return None
 
 
+@lru_cache(maxsize=256)
+def _parse_word_boost_cached(prompt: str) -> Optional[tuple]:
+    # Split by spaces and commas; bare split() already strips and drops
+    # empty tokens, so no per-word strip/filter pass is needed. Stored as
+    # a tuple so cached values are immutable.
+    words = prompt.translate(_COMMA_TO_SPACE).split()
+    return tuple(words) if words else None
+
+
 def parse_word_boost(prompt: Optional[str]) -> Optional[List[str]]:
     """Parse OpenAI prompt into AssemblyAI word_boost array"""
     if not prompt:
         return None
-    
-    # Split by spaces and commas, filter empty strings
-    words = [word.strip() for word in prompt.replace(",", " ").split() if word.strip()]
-    return words if words else None
+
+    # Repeated prompts (boilerplate word lists) hit the cache and skip
+    # the string work; return a fresh list to preserve the public API
+    words = _parse_word_boost_cached(prompt)
+    return list(words) if words else None
 
 
 def format_openai_error(message: str, error_type: str = "invalid_request_error", code: Optional[str] = None) -> Dict[str, Any]:
     """Format error response in OpenAI format"""
-    error_data = {
-        "message": message,
-        "type": error_type
-    }
-    
+    # Build each shape as a single literal rather than build-then-mutate
     if code:
-        error_data["code"] = code
-    
-    return {"error": error_data}
+        return {"error": {"message": message, "type": error_type, "code": code}}
+    return {"error": {"message": message, "type": error_type}}
+
+
+@lru_cache(maxsize=128)
+def format_openai_error_bytes(message: str, error_type: str = "invalid_request_error", code: Optional[str] = None) -> bytes:
+    """Pre-serialized variant of format_openai_error for static error payloads
+
+    Repeated errors with the same (message, type, code) - e.g. validation
+    failures under a retry storm - reuse the cached bytes with no JSON
+    encoding per response.
+    """
+    return orjson.dumps(format_openai_error(message, error_type, code))
 
 
 def parse_prompt_for_speaker_diarization(prompt: str) -> tuple[bool, str]:
     """Parse prompt for speaker diarization control and return (enabled, cleaned_prompt)"""
     if not prompt:
         return False, None
-    
-    # Check for speaker diarization flags (case insensitive)
-    prompt_lower = prompt.lower()
+
     speaker_diarization = False
-    
-    # Look for various patterns (both speaker_labels and speaker_diarization)
-    patterns = [
-        "speaker_labels=true",
-        "speaker_labels:true", 
-        "speaker_labels true",
-        "enable_speaker_labels",
-        "speaker_diarization=true",
-        "speaker_diarization:true", 
-        "speaker_diarization true",
-        "enable_speaker_diarization",
-        "diarization=true",
-        "diarization:true",
-        "diarization true"
-    ]
-    
     cleaned_prompt = prompt
-    for pattern in patterns:
-        if pattern in prompt_lower:
-            speaker_diarization = True
-            # Remove the control pattern from the prompt
-            # Find the actual case in the original prompt
-            start_idx = prompt_lower.find(pattern)
-            if start_idx != -1:
-                cleaned_prompt = (prompt[:start_idx] + prompt[start_idx + len(pattern):]).strip()
-            break
-    
+
+    # Single regex scan over the prompt instead of one search per pattern
+    match = _DIARIZATION_RE.search(prompt)
+    if match:
+        speaker_diarization = True
+        # Remove the control pattern from the prompt
+        cleaned_prompt = (prompt[:match.start()] + prompt[match.end():]).strip()
+
     # Return empty string as None if prompt becomes empty after cleaning
     cleaned_prompt = cleaned_prompt if cleaned_prompt else None
-    
+
     return speaker_diarization, cleaned_prompt
 
 
@@ -149,41 +170,35 @@ def parse_prompt_for_config(prompt: str) -> tuple[dict, str]:
         pass
     
     # Check for speaker diarization flags (case insensitive) - legacy support
-    prompt_lower = prompt.lower()
-    speaker_diarization = False
-    
-    # Look for various patterns (both speaker_labels and speaker_diarization)
-    patterns = [
-        "speaker_labels=true",
-        "speaker_labels:true", 
-        "speaker_labels true",
-        "enable_speaker_labels",
-        "speaker_diarization=true",
-        "speaker_diarization:true", 
-        "speaker_diarization true",
-        "enable_speaker_diarization",
-        "diarization=true",
-        "diarization:true",
-        "diarization true"
-    ]
-    
-    for pattern in patterns:
-        if pattern in prompt_lower:
-            speaker_diarization = True
-            config_dict["speaker_labels"] = True
-            # Remove the control pattern from the prompt
-            # Find the actual case in the original prompt
-            start_idx = prompt_lower.find(pattern)
-            if start_idx != -1:
-                cleaned_prompt = (prompt[:start_idx] + prompt[start_idx + len(pattern):]).strip()
-            break
-    
+    # Single regex scan over the prompt instead of one search per pattern
+    match = _DIARIZATION_RE.search(prompt)
+    if match:
+        config_dict["speaker_labels"] = True
+        # Remove the control pattern from the prompt
+        cleaned_prompt = (prompt[:match.start()] + prompt[match.end():]).strip()
+
     # Return empty string as None if prompt becomes empty after cleaning
     cleaned_prompt = cleaned_prompt if cleaned_prompt else None
     
     return config_dict, cleaned_prompt
 
 
+def _convert_timestamps(items: List[Dict[str, Any]]) -> tuple[list, list]:
+    """Convert start/end millisecond columns to seconds
+
+    Long transcripts are converted in one vectorized NumPy pass instead of
+    per-item Python arithmetic; short ones stay pure Python.
+    """
+    n = len(items)
+    if n >= _VECTORIZE_MIN_ITEMS:
+        starts = (np.fromiter((it.get("start", 0) for it in items), dtype=np.int64, count=n) * _MS_TO_S).tolist()
+        ends = (np.fromiter((it.get("end", 0) for it in items), dtype=np.int64, count=n) * _MS_TO_S).tolist()
+    else:
+        starts = [it.get("start", 0) * _MS_TO_S for it in items]
+        ends = [it.get("end", 0) * _MS_TO_S for it in items]
+    return starts, ends
+
+
 def convert_assemblyai_to_openai_response(assemblyai_response: Dict[str, Any], response_format: str = "json") -> Dict[str, Any]:
     """Convert AssemblyAI response to OpenAI format"""
     if response_format == "text":
@@ -198,43 +213,35 @@ def convert_assemblyai_to_openai_response(assemblyai_response: Dict[str, Any], r
     }
     
     # Convert utterances to segments if speaker diarization is available
-    if assemblyai_response.get("utterances"):
-        segments = []
-        for utterance in assemblyai_response["utterances"]:
-            segment = {
-                "id": len(segments),
-                "seek": utterance.get("start", 0),
-                "start": utterance.get("start", 0) / 1000.0,  # Convert ms to seconds
-                "end": utterance.get("end", 0) / 1000.0,
-                "text": utterance.get("text", ""),
-                "speaker": utterance.get("speaker", "Unknown"),  # Add speaker info
-                "tokens": [],
-                "temperature": 0.0,
-                "avg_logprob": 0.0,
-                "compression_ratio": 1.0,
-                "no_speech_prob": 0.0
+    if utterances := assemblyai_response.get("utterances"):
+        starts, ends = _convert_timestamps(utterances)
+        openai_response["segments"] = [
+            {
+                **_SEG_DEFAULTS,
+                "id": i,
+                "seek": u.get("start", 0),
+                "start": starts[i],
+                "end": ends[i],
+                "text": u.get("text", ""),
+                "speaker": u.get("speaker", "Unknown")  # Add speaker info
             }
-            segments.append(segment)
-        openai_response["segments"] = segments
+            for i, u in enumerate(utterances)
+        ]
     # Fallback to words if no utterances (no speaker diarization)
-    elif assemblyai_response.get("words"):
-        segments = []
-        for word in assemblyai_response["words"]:
-            segment = {
-                "id": len(segments),
-                "seek": word.get("start", 0),
-                "start": word.get("start", 0) / 1000.0,  # Convert ms to seconds
-                "end": word.get("end", 0) / 1000.0,
-                "text": word.get("text", ""),
-                "tokens": [],
-                "temperature": 0.0,
-                "avg_logprob": 0.0,
-                "compression_ratio": 1.0,
-                "no_speech_prob": 0.0
+    elif words := assemblyai_response.get("words"):
+        starts, ends = _convert_timestamps(words)
+        openai_response["segments"] = [
+            {
+                **_SEG_DEFAULTS,
+                "id": i,
+                "seek": w.get("start", 0),
+                "start": starts[i],
+                "end": ends[i],
+                "text": w.get("text", "")
             }
-            segments.append(segment)
-        openai_response["segments"] = segments
-    
+            for i, w in enumerate(words)
+        ]
+
     return openai_response
 
 
@@ -242,19 +249,26 @@ def validate_audio_url(url: str) -> bool:
     """Basic validation for audio URL"""
     if not url:
         return False
-    
+
     # Check if it's a valid URL format
     if not url.startswith(("http://", "https://")):
         return False
-    
-    # Check for common audio file extensions
-    audio_extensions = [".wav", ".mp3", ".m4a", ".flac", ".ogg", ".aac", ".wma"]
-    url_lower = url.lower()
-    
-    # Either has audio extension or could be a streaming URL
-    return any(ext in url_lower for ext in audio_extensions) or "audio" in url_lower
+
+    # Either has audio extension or could be a streaming URL - one compiled
+    # pattern covers both so the URL is scanned once, with no lowered copy
+    return _AUDIO_URL_RE.search(url) is not None
+
+
+# Last formatted timestamp, cached at second granularity as [epoch, string]
+_TS_CACHE = [0, ""]
 
 
 def get_current_timestamp() -> str:
     """Get current timestamp in ISO format"""
-    return datetime.utcnow().isoformat() + "Z"
+    # The string only changes once a second, so repeated calls within the
+    # same second reduce to an int compare
+    t = int(time.time())
+    if t != _TS_CACHE[0]:
+        _TS_CACHE[0] = t
+        _TS_CACHE[1] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t))
+    return _TS_CACHE[1]